@@ -7,25 +7,26 @@ cafpath = ""
 app = Flask(__name__)
 
 disklist = None
-lastreverse = True
 currentcat = None
 lastlabel = None
+report = None
+catcache = {}
+mapped = None
+mapdir = None
 
-def mySort(list,keyname,tdict):
+def mySort(list,keyname,desc,tdict):
 	# mysort takes the url sort parameter in keyname and uses tdict to get the key number
-	global lastreverse
+	# the direction comes from the url too (desc=1), so every worker process sorts the same way
 	if keyname == None:
-		lastreverse = True
 		return sorted(list,key=lambda x: x[0], reverse=False)
 	keyno = tdict[keyname]
-	lastreverse = not lastreverse
-	return sorted(list,key=lambda x: x[keyno], reverse=lastreverse)
+	return sorted(list,key=lambda x: x[keyno], reverse=desc)
 
 @app.route("/")
 def index():
 	global disklist
-	global lastreverse
 	sort = request.args.get('sort')
+	desc = request.args.get('desc') == '1'
 	#url = request.base_url
 	#print(sort, url)
 	if disklist == None:
@@ -37,19 +38,20 @@ def index():
 			used = int(int(cat.info[0][2])/1000/1000/1000)
 			total = round(float(free+used)/500)*.5
 			disklist.append((fil,used,free,total,cat.archive))
-		disklist = mySort(disklist,'name',{ 'name':0, 'used':1, 'free':2, 'total':3 })
-	else:
-		disklist = mySort(disklist,sort,{ 'name':0, 'used':1, 'free':2, 'total':3 })
+	disks = mySort(disklist,sort,desc,{ 'name':0, 'used':1, 'free':2, 'total':3 })
 
-	return render_template('index.html', title='DISKS', files=[(x[0],'{0:,}'.format(x[1]),'{0:,}'.format(x[2]),'{0:,.1f}'.format(x[3]), x[4]) for x in disklist])
+	return render_template('index.html', title='DISKS', files=[(x[0],'{0:,}'.format(x[1]),'{0:,}'.format(x[2]),'{0:,.1f}'.format(x[3]), x[4]) for x in disks])
 
 
 @app.route("/browse/<path>/<dir_id>")
 def browse(path="",dir_id="0"):	
 	global currentcat, lastlabel
 	sort = request.args.get('sort')
+	desc = request.args.get('desc') == '1'
 	cid = int(dir_id)
-	if path != lastlabel:
+	if mapped != None:
+		currentcat = mapped[path+".caf"]
+	elif path != lastlabel:
 		print("reading file..")
 		caffile = os.path.join(cafpath,path+".caf")
 		currentcat = cathy.CathyCat.from_file(caffile)
@@ -63,9 +65,9 @@ def browse(path="",dir_id="0"):
 	else:
 		pdir = "root"
 
-	childs = mySort(currentcat.getChildren(cid) ,sort,{ 'name':0, 'size':1})
+	childs = mySort(currentcat.getChildren(cid) ,sort,desc,{ 'name':0, 'size':1})
 
-	return render_template('browse.html', title=path, dirname=dirname, pdir=pdir, files=[(x[0],'{0:,.0f}'.format(int(x[1])/1000),x[2]) for x in childs])
+	return render_template('browse.html', title=path, dirname=dirname, pdir=pdir, sort=sort, desc=desc, files=[(x[0],'{0:,.0f}'.format(int(x[1])/1000),x[2]) for x in childs])
 
 
 @app.route("/disksearch/<path>", methods=["GET", "POST"])
@@ -82,17 +84,90 @@ def search(path=""):
 		else:
 			archive = False
 
-		response = cathy.searchFor(tpath,req['search'],archive)
-		return render_template('results.html', title="results", search=req['search'], results=[(x[0],'{0:,}'.format(int(x[1]/1000))) for x in response])
+		limits = [req.get(x, '').strip() for x in ('minsize', 'maxsize', 'after', 'before')]
+		if any(limits):
+			try:
+				minsize, maxsize = [cathy.parseSize(x) if x else None for x in limits[:2]]
+				after, before = [cathy.parseDate(x) if x else None for x in limits[2:]]
+			except ValueError:
+				return redirect('/')
+			if mapped != None:
+				response = cathy.searchMapped(searchCats(path),req['search'],archive,minsize,maxsize,after,before)
+			else:
+				response = cathy.findFiles(tpath,req['search'],minsize,maxsize,after,before,archive,catcache,mapdir)
+		elif mapped != None:
+			response = cathy.searchMapped(searchCats(path),req['search'],archive)
+		else:
+			response = cathy.searchFor(tpath,req['search'],archive)
+		return render_template('results.html', title="results", search=' '.join([req['search']]+[x for x in limits if x]), results=[(x[0],'{0:,}'.format(int(x[1]/1000))) for x in response])
 
 	return redirect('/')
 
+def searchCats(path):
+	# the mapped catalogs a search covers, all of them or the one of a disksearch
+	if path != "":
+		return { path+'.caf': mapped[path+'.caf'] }
+	return mapped
+
+def getReport():
+	global report
+	if report == None:
+		report = cathy.spaceReport(cafpath, 50)
+	return report
+
+@app.route("/top")
+def top():
+	topfiles, topdirs, sizehist, agehist = getReport()
+	return render_template('top.html', title='LARGEST',
+		files=[(x[1].replace(".caf",""),x[2],'{0:,}'.format(int(x[0]/1000/1000))) for x in topfiles],
+		dirs=[(x[1].replace(".caf",""),x[2],'{0:,}'.format(int(x[0]/1000/1000))) for x in topdirs])
+
+@app.route("/sizes")
+def sizes():
+	topfiles, topdirs, sizehist, agehist = getReport()
+	return render_template('sizes.html', title='SIZES',
+		sizes=[(x[0],'{0:,}'.format(x[1]),'{0:,}'.format(int(x[2]/1000/1000/1000))) for x in sizehist],
+		ages=[(x[0],'{0:,}'.format(x[1]),'{0:,}'.format(int(x[2]/1000/1000/1000))) for x in agehist])
+
+def configure(path, camdir=None, use_map=False):
+	# sets the caf path and where the .cam files go, with use_map all catalogs are served from shared memory mapped .cam files
+	# and the /top and /sizes report is built up front
+	global cafpath, mapped, mapdir
+	cafpath = path
+	mapdir = camdir
+	if use_map:
+		mapped = cathy.mapCatalogs(cafpath, mapdir)
+		# build the report once here, the workers forked from the preloaded app inherit it
+		getReport()
+
+def serve(workers, port):
+	# production server: gunicorn with a pool of worker processes, the app (and its mapped catalogs) is loaded before forking
+	try:
+		from gunicorn.app.base import BaseApplication
+	except ImportError:
+		exit("The production server needs gunicorn, do 'pip install gunicorn'")
+
+	class CathyApplication(BaseApplication):
+		def load_config(self):
+			self.cfg.set('bind', '0.0.0.0:%d' % port)
+			self.cfg.set('workers', workers)
+			self.cfg.set('preload_app', True)
+
+		def load(self):
+			return app
+
+	CathyApplication().run()
+
 def main():
 	app.run(host='0.0.0.0', debug=True)
 
 if __name__ == "__main__":
-	if len(argv) != 2:
+	if len(argv) < 2:
 		exit("Missing path to caf files!")
-	cafpath = argv[1]
-	main()
-
+	options = dict(zip(argv[2::2], argv[3::2]))
+	if '--workers' in options:
+		configure(argv[1], options.get('--mapdir'), use_map=True)
+		serve(int(options['--workers']), int(options.get('--port', 5000)))
+	else:
+		configure(argv[1], options.get('--mapdir'))
+		main()
@@ -48,6 +48,16 @@ cat.info[folder id] returns a tuple (id, filecount, dirsize)
 2022/08/05  Fixed support for foreign characters (see github issue)
 2022/08/28  Fixed a bug (saveVersion -> self.saveVersion)
 2022/09/14  Replaced the readstring function by a new version that should work better with UTF-8!?
+2026/10/19  Added iterelements() to stream the elements of a .caf without building cat.elm
+            Added top and sizes reports (spaceReport) over all .caf files in one pass
+            Added scanall to scan several volumes in parallel, one thread per physical disk
+            Added find with size and date ranges, answered from sorted size and date indexes (rangeindex)
+            path() and lookup_dir_id() use a folder id dict instead of looping over all elements
+            Added lookup to find a list of names in one pass per .caf (PatternMatcher, Aho-Corasick)
+            Added MappedCat, a read-only memory mapped .cam version of a .caf for multi-worker web serving
+            find answers from the .cam file instead of parsing the .caf
+            Added header_fields() and patch_header() to change archive, comment, alias and free size in place,
+            setarchive uses it and no longer converts v7 files to v8 or resets the catalog date
 
 USAGE
 
@@ -57,8 +67,26 @@ python cathy.py search <searchitem>
 python cathy.py scan <path>
 # the same as scan but with Cathy archive set
 python cathy.py scanarchive <path>
+# scan several volumes in parallel, one worker per physical disk (mounted volumes if no path is given)
+python cathy.py scanall [<path> ...]
+# set or clear the archive flag of one or more .caf files, without rewriting the catalogs
+python cathy.py setarchive <caf> [<caf> ...]
+python cathy.py unsetarchive <caf> [<caf> ...]
+# change the comment or the alias of one or more .caf files
+python cathy.py setcomment <caf> [<caf> ...] <comment>
+python cathy.py setalias <caf> [<caf> ...] <alias>
 # display disk usage overview
 python cathy.py usage
+# find files by size and/or date, optionally with name terms (sizes like 4G, dates like 2020-01-31)
+python cathy.py find [<term> ...] [--min-size <size>] [--max-size <size>] [--after <date>] [--before <date>] [--mapdir <dir>]
+# report which disks hold the substrings (or with --exact the names) listed in a file, one per line
+python cathy.py lookup <file> [--exact]
+# build the memory mapped .cam files used by the web server (in the .caf dir or in <dir>)
+python cathy.py map [<dir>]
+# list the largest files and directories of all .caf files (default 20)
+python cathy.py top [<n>]
+# display file size and file age distribution of all .caf files
+python cathy.py sizes
 '''
 
 from __future__ import (print_function, division)
@@ -73,8 +101,15 @@ from struct import calcsize, unpack, pack
 from time import ctime
 from binascii import b2a_hex
 import shutil
+import heapq
+import threading
+import mmap
+import json
+from collections import deque
+from bisect import bisect_left, bisect_right
+from array import array
 
-from sys import platform, version_info, argv
+from sys import platform, version_info, argv, stdout, byteorder
 
 DEBUG = False
 
@@ -107,6 +142,10 @@ class CathyCat():
         self.freesize = m_fFreeSize
         self.archive = m_sArchive
         self.totaldirs = 0
+        self.version = CathyCat.saveVersion  # format version of the file this was read from
+        self.elmoffset = 0  # file offset of the element section, set by from_file
+        self._dirindex = None
+        self._rangeindex = None
 
         self.info = info
         self.elm = elm
@@ -199,46 +238,191 @@ class CathyCat():
             tcnt = tcnt + 1
 
         info = m_paPaths
+        elmoffset = cls.buffer.tell()
 
         if no_elm:
             cls.buffer.close()
-            return cls(pathcatname, m_timeDate, m_strDevice, m_strVolume, m_strAlias, m_szVolumeName, m_dwSerialNumber, m_strComment, m_fFreeSize, m_sArchive, info, [])
+            cat = cls(pathcatname, m_timeDate, m_strDevice, m_strVolume, m_strAlias, m_szVolumeName, m_dwSerialNumber, m_strComment, m_fFreeSize, m_sArchive, info, [])
+            cat.version = m_sVersion
+            cat.elmoffset = elmoffset
+            return cat
 
+        elm = list(cls.readelements(cls.buffer, m_sVersion))
+
+        cls.buffer.close()
+
+        cat = cls(pathcatname, m_timeDate, m_strDevice, m_strVolume, m_strAlias, m_szVolumeName, m_dwSerialNumber, m_strComment, m_fFreeSize, m_sArchive, info, elm)
+        cat.version = m_sVersion
+        cat.elmoffset = elmoffset
+        return cat
+
+    @classmethod
+    def readelements(cls, buf, m_sVersion):
+        '''
+        generator over the element section of an open .caf buffer,
+        buf has to be positioned at the element count
+        '''
         # files : date, size, parentfolderid, filename
         # if it's a folder :  date, -thisfolderid, parentfolderid, filename
-        m_paFileList = []
-        lLen = cls.readbuf('<l')  # 4 bytes
+        lLen = unpack('<l', buf.read(4))[0]  # 4 bytes
         if DEBUG:
             print("#Files:", lLen)
         for l in range(lLen):
-            # elmdate = ctime(cls.readbuf('<L'))
-            elmdate = cls.readbuf('<L')  # 4 bytes
+            elmdate = unpack('<L', buf.read(4))[0]  # 4 bytes
             if m_sVersion <= 6:
                 # later, won't test for now
                 m_lLength = 0
             else:
-                # m_lLength = cls.buffer.read(8)
-                m_lLength = cls.readbuf('<q')  # 8 bytes
+                m_lLength = unpack('<q', buf.read(8))[0]  # 8 bytes
             if m_sVersion > 7:
-                m_sPathName = cls.readbuf('<L')  # 4 bytes
+                m_sPathName = unpack('<L', buf.read(4))[0]  # 4 bytes
             else:
-                m_sPathName = cls.readbuf('H')  # 2 bytes
-            m_pszName = cls.readstring()
+                m_sPathName = unpack('H', buf.read(2))[0]  # 2 bytes
+            chain = []
+            while 1:
+                chr = buf.read(1)
+                if chr == CathyCat.delim or not chr:
+                    break
+                chain.append(chr)
+            m_pszName = b''.join(chain).decode('latin1')
             if DEBUG:
                 print(elmdate, m_lLength, m_sPathName, m_pszName)
-            m_paFileList.append((elmdate, m_lLength, m_sPathName, m_pszName))
-
-        elm = m_paFileList
+            yield (elmdate, m_lLength, m_sPathName, m_pszName)
 
-        cls.buffer.close()
-
-        return cls(pathcatname, m_timeDate, m_strDevice, m_strVolume, m_strAlias, m_szVolumeName, m_dwSerialNumber, m_strComment, m_fFreeSize, m_sArchive, info, elm)
+    def iterelements(self):
+        '''
+        streams the elements of a .caf file one by one, without building self.elm
+        works on instances from from_file or fast_from_file
+        '''
+        with open(self.pathcat, 'rb') as buf:
+            buf.seek(self.elmoffset)
+            for el in CathyCat.readelements(buf, self.version):
+                yield el
 
     @classmethod
     def fast_from_file(cls, pathcatname):
         # only reads the header info for freespace, archive bit etc.
         return cls.from_file(pathcatname, no_elm=True)
 
+    @classmethod
+    def header_fields(cls, pathcatname):
+        '''
+        locates the header fields of a .caf file without reading the rest
+        returns (fields, end): fields is a dict name -> (offset, length) for the fields this
+        version of the file has (strings include their 0 delimiter), end is where the folder info starts
+        '''
+        fields = {}
+
+        def read(fp, nb):
+            data = fp.read(nb)
+            if len(data) != nb:
+                raise EOFError
+            return data
+
+        with open(pathcatname, 'rb') as fp:
+
+            def field(name, nb):
+                fields[name] = (fp.tell(), nb)
+                return read(fp, nb)
+
+            def stringfield(name):
+                start = fp.tell()
+                while read(fp, 1) != CathyCat.delim:
+                    pass
+                fields[name] = (start, fp.tell()-start)
+
+            # a truncated file is not a valid caf file either
+            try:
+                ul = unpack('<L', read(fp, 4))[0]
+                if not (ul > 0 and ul % CathyCat.ulModus == CathyCat.ulMagicBase):
+                    return None, 0
+                m_sVersion = int(ul/CathyCat.ulModus)
+                if m_sVersion > 2:
+                    m_sVersion = unpack('h', field('version', 2))[0]
+                if m_sVersion > CathyCat.sVersion:
+                    return None, 0
+
+                field('date', 4)
+                if m_sVersion >= 2:
+                    stringfield('device')
+                stringfield('volume')
+                stringfield('alias')
+                field('serial', 4)
+                if m_sVersion >= 4:
+                    stringfield('comment')
+                if m_sVersion >= 1:
+                    field('freesize', 4)
+                if m_sVersion >= 6:
+                    field('archive', 2)
+            except EOFError:
+                return None, 0
+            return fields, fp.tell()
+
+    @classmethod
+    def patch_header(cls, pathcatname, archive=None, comment=None, alias=None, freesize=None):
+        '''
+        changes archive, comment, alias and/or free size (in Mb) of a .caf file without parsing the elements.
+        Fixed size fields, and strings that keep their length, are overwritten in place.
+        When a string changes length only the header is rebuilt and the rest of the file is copied as is.
+        The version and the catalog date are left alone. Returns False if the file doesn't have a field.
+        '''
+        fields, end = cls.header_fields(pathcatname)
+        if fields is None:
+            print("Not a valid caf file", pathcatname)
+            return False
+        patches = []
+        for name, value in (('archive', archive), ('comment', comment), ('alias', alias), ('freesize', freesize)):
+            if value is None:
+                continue
+            if name not in fields:
+                print("The caf version of", pathcatname, "has no", name)
+                return False
+            if name == 'archive':
+                data = pack('h', value)
+            elif name == 'freesize':
+                data = pack('<f', value)
+            else:
+                data = value.encode('utf-8', errors='replace') + CathyCat.delim
+            patches.append((fields[name][0], fields[name][1], data))
+        patches.sort()
+
+        if all(len(data) == nb for offset, nb, data in patches):
+            with open(pathcatname, 'r+b') as fp:
+                for offset, nb, data in patches:
+                    fp.seek(offset)
+                    fp.write(data)
+        else:
+            tmpname = pathcatname + '.tmp'
+            try:
+                with open(pathcatname, 'rb') as src:
+                    header = src.read(end)
+                    newheader = []
+                    pos = 0
+                    for offset, nb, data in patches:
+                        newheader.append(header[pos:offset])
+                        newheader.append(data)
+                        pos = offset + nb
+                    newheader.append(header[pos:])
+                    with open(tmpname, 'wb') as dst:
+                        dst.write(b''.join(newheader))
+                        shutil.copyfileobj(src, dst, 1024*1024)
+                # the new file replaces the catalog, so it gets the catalog's permissions
+                shutil.copymode(pathcatname, tmpname)
+                if hasattr(os, 'replace'):
+                    os.replace(tmpname, pathcatname)
+                else:
+                    os.remove(pathcatname)
+                    os.rename(tmpname, pathcatname)
+            finally:
+                if ospath.exists(tmpname):
+                    os.remove(tmpname)
+        # the .cam holds the header fields too, drop it so it is rebuilt
+        # (a .cam in another mapdir goes stale through the .caf mtime)
+        pathmapname = pathcatname[:-4] + '.cam'
+        if pathcatname.endswith('.caf') and ospath.isfile(pathmapname):
+            os.remove(pathmapname)
+        return True
+
     def write(self, pathcatname):
 
         try:
@@ -323,11 +507,9 @@ class CathyCat():
                 pths.append(self.catpath())
                 break
             else:
-                for elmid, elm in enumerate(self.elm):
-                    if elm[1] == -pn or elm[1] == pn:
-                        # print('>',elm)
-                        nm = elm[3]
-                        break
+                dirindex = self.dirindex()
+                if pn in dirindex:
+                    elmid = dirindex[pn]
                 else:
                     nm = "ERRDIR"
                     print('error in parenting for ', pn, ', using "ERRDIR"')
@@ -358,14 +540,81 @@ class CathyCat():
                 return elm[3]
 
     def lookup_dir_id(self, elmid):
-        FOUND = False
-        tcnt = 0
-        while not FOUND:
-            if self.elm[tcnt][1] == -elmid:
-                FOUND = True
+        return self.dirindex()[elmid]
+
+    def dirindex(self):
+        '''
+        returns a dict folder id -> index in self.elm, built on first use
+        '''
+        if self._dirindex is None:
+            self._dirindex = dict((-el[1], i) for i, el in enumerate(self.elm) if el[1] < 0)
+        return self._dirindex
+
+    def rangeindex(self):
+        '''
+        returns the sorted secondary indexes of the files (not folders) of this catalog:
+        (sizeorder, sizes, dateorder, dates)
+        sizeorder holds element ids sorted by size and sizes the matching sizes,
+        so a size range is a bisect on sizes. dateorder/dates is the same for the file dates.
+        The indexes are built on first use and kept in memory (MappedCat keeps them in its .cam file).
+        Needs Python 3 (the 'q' array typecode).
+        '''
+        if self._rangeindex is None:
+            elm = self.elm
+            ids = [i for i in range(len(elm)) if elm[i][1] >= 0]
+            sizeorder = array('I', sorted(ids, key=lambda i: elm[i][1]))
+            sizes = array('q', [elm[i][1] for i in sizeorder])
+            dateorder = array('I', sorted(ids, key=lambda i: elm[i][0]))
+            dates = array('I', [elm[i][0] for i in dateorder])
+            self._rangeindex = (sizeorder, sizes, dateorder, dates)
+        return self._rangeindex
+
+    def findrange(self, minsize=None, maxsize=None, after=None, before=None, searchterm=''):
+        '''
+        returns the ids of the files with minsize <= size <= maxsize and after <= date < before
+        (dates as unix time) whose name contains all terms of searchterm, sorted by id.
+        Every limit is optional. The narrowest of the size and date ranges is taken from
+        the sorted indexes, the other conditions are only checked on that range.
+        '''
+        searchlist = [term for term in searchterm.lower().split(' ') if term]
+        sizeorder, sizes, dateorder, dates = self.rangeindex()
+        ranges = []
+        if minsize is not None or maxsize is not None:
+            lo = 0 if minsize is None else bisect_left(sizes, minsize)
+            hi = len(sizes) if maxsize is None else bisect_right(sizes, maxsize)
+            ranges.append((max(hi-lo, 0), sizeorder, lo, hi))
+        if after is not None or before is not None:
+            lo = 0 if after is None else bisect_left(dates, after)
+            hi = len(dates) if before is None else bisect_left(dates, before)
+            ranges.append((max(hi-lo, 0), dateorder, lo, hi))
+        if ranges:
+            cnt, order, lo, hi = min(ranges, key=lambda x: x[0])
+            candidates = order[lo:hi]
+        else:
+            candidates = sizeorder
+
+        found = []
+        for i in candidates:
+            dt, lg, pn, nm = self.elm[i]
+            if minsize is not None and lg < minsize:
+                continue
+            if maxsize is not None and lg > maxsize:
+                continue
+            if after is not None and dt < after:
+                continue
+            if before is not None and dt >= before:
+                continue
+            if searchlist:
+                nm = nm.lower()
+                for term in searchlist:
+                    if not term in nm:
+                        break
+                else:
+                    found.append(i)
             else:
-                tcnt = tcnt + 1
-        return tcnt
+                found.append(i)
+        found.sort()
+        return found
 
     def lookup(self, elmname):
         '''
@@ -543,19 +792,27 @@ class CathyCat():
         return (dir_id, filecnt, tsize)
 
     @ classmethod
-    def scan(cls, start_path, no_disk=False):
+    def get_disk_info(cls, start_path):
+        # label, serial and free space of a volume, the helpers shell out to df/blkid/diskutil (sudo blkid on linux)
+        return {'volume': cls.get_label(start_path), 'serial': cls.get_serial(start_path),
+                'freesize': cls.get_free_space(start_path)}
+
+    @ classmethod
+    def scan(cls, start_path, no_disk=False, progress=None, diskinfo=None):
         # the scan function initializes the global caf parameters then calls the recursive scandir function
+        # progress is an optional dict that gets the catalog under construction as 'cat',
+        # so another thread can follow the scan with len(progress['cat'].elm)
+        # diskinfo is an optional dict from get_disk_info that was read beforehand
         pathcat = start_path		# catalogfilename in the cathy's ui
         date = int(time.time())		# caf creation date
         device = start_path			# for device now the start_path is used, for win this is prob drive letter, but for linux this will be the root dir
         if no_disk:
-            volume = os.path.basename(start_path)
-            serial = '0000-0000'
-            freesize = 0
-        else:
-            volume = cls.get_label(start_path)
-            serial = cls.get_serial(start_path)
-            freesize = cls.get_free_space(start_path)
+            diskinfo = {'volume': os.path.basename(start_path), 'serial': '0000-0000', 'freesize': 0}
+        elif diskinfo is None:
+            diskinfo = cls.get_disk_info(start_path)
+        volume = diskinfo['volume']
+        serial = diskinfo['serial']
+        freesize = diskinfo['freesize']
         alias = volume
         volumename = volume
         comment = ""
@@ -564,11 +821,25 @@ class CathyCat():
         # init empty CathyCat class
         t_cat = cls(pathcat, date, device, volume, alias, volumename,
                     serial, comment, freesize, archive, [], [])
+        if progress is not None:
+            progress['cat'] = t_cat
         t_cat.info.append(t_cat.scandir(0, start_path))
         t_cat.info.sort()
 
         return t_cat
 
+    def write_atomic(self, pathcatname):
+        # writes to a temporary file next to pathcatname and renames it,
+        # so an interrupted scan never leaves a truncated .caf behind
+        tmpname = pathcatname + '.tmp'
+        self.write(tmpname)
+        if hasattr(os, 'replace'):
+            os.replace(tmpname, pathcatname)
+        else:
+            if ospath.exists(pathcatname):
+                os.remove(pathcatname)
+            os.rename(tmpname, pathcatname)
+
     def getChildren(self, id):
         children = []
         for i in range(len(self.elm)):
@@ -580,6 +851,329 @@ class CathyCat():
                     children.append((self.elm[i][3], int(self.elm[i][1]), ""))
         return children
 
+
+class MappedElements():
+    # read-only cat.elm replacement on top of the columns of a .cam file
+    def __init__(self, dates, sizes, parents, nameoff, names):
+        self.dates = dates
+        self.sizes = sizes
+        self.parents = parents
+        self.nameoff = nameoff
+        self.names = names
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i = i + len(self.dates)
+        name = self.names[self.nameoff[i]:self.nameoff[i+1]-1].tobytes().decode('latin1')
+        return (self.dates[i], self.sizes[i], self.parents[i], name)
+
+    def __iter__(self):
+        for i in range(len(self.dates)):
+            yield self[i]
+
+
+class MappedInfo():
+    # read-only cat.info replacement, info[dir id] -> (dir id, filecount, dirsize)
+    def __init__(self, files, sizes):
+        self.files = files
+        self.sizes = sizes
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i = i + len(self.files)
+        return (i, self.files[i], self.sizes[i])
+
+
+class MappedDirIndex():
+    # read-only cat.dirindex() replacement, folder id -> index in cat.elm
+    def __init__(self, direlm):
+        self.direlm = direlm
+
+    def __contains__(self, dir_id):
+        return 0 <= dir_id < len(self.direlm) and self.direlm[dir_id] != MappedCat.NOELM
+
+    def __getitem__(self, dir_id):
+        if dir_id not in self:
+            raise KeyError(dir_id)
+        return self.direlm[dir_id]
+
+
+class MappedCat(CathyCat):
+    '''
+    a catalog read from a .cam file: the elements, folder info and the size/date/children indexes
+    of a .caf stored as fixed width columns that are memory mapped and used in place.
+    Processes that map the same .cam share its pages through the OS page cache,
+    so every extra web worker adds almost no memory. Build the .cam with MappedCat.build(caf, cam).
+
+    .cam layout: 'CATHYMAP', .caf size, .caf mtime (ns), json length (<8sqqq), json header
+    with the catalog fields and the (offset, typecode, count) of every column, then the columns,
+    8 byte aligned and in native byte order (the byte order is in the header)
+
+    Needs Python 3 (memoryview.cast and the 'q' array typecode), so do map, find and the production server.
+    '''
+
+    NOELM = 0xFFFFFFFF
+    columns = [('dates', 'I'), ('sizes', 'q'), ('parents', 'I'), ('nameoff', 'Q'), ('names', 'B'), ('lnames', 'B'),
+               ('infofiles', 'i'), ('infosizes', 'd'), ('direlm', 'I'), ('childorder', 'I'), ('childstart', 'Q'),
+               ('sizeorder', 'I'), ('sortsizes', 'q'), ('dateorder', 'I'), ('sortdates', 'I')]
+
+    @classmethod
+    def build(cls, pathcatname, pathmapname):
+        '''
+        writes the .cam file for a .caf file
+        '''
+        cat = CathyCat.from_file(pathcatname)
+        if cat is None:
+            return False
+        st = os.stat(pathcatname)
+        elm = cat.elm
+        n = len(elm)
+
+        nslots = len(cat.info)
+        for el in elm:
+            nslots = max(nslots, el[2]+1, -el[1]+1)
+        cols = {}
+        cols['dates'] = array('I', [el[0] for el in elm])
+        cols['sizes'] = array('q', [el[1] for el in elm])
+        cols['parents'] = array('I', [el[2] for el in elm])
+        names = []
+        lnames = []
+        nameoff = array('Q', [0])
+        for el in elm:
+            name = el[3].encode('latin1', 'replace')
+            lname = el[3].lower().encode('latin1', 'replace')
+            if len(lname) != len(name):
+                lname = name.lower()
+            names.append(name + CathyCat.delim)
+            lnames.append(lname + CathyCat.delim)
+            nameoff.append(nameoff[-1] + len(name) + 1)
+        cols['nameoff'] = nameoff
+        cols['names'] = array('B', b''.join(names))
+        cols['lnames'] = array('B', b''.join(lnames))
+        cols['infofiles'] = array('i', [0]*nslots)
+        cols['infosizes'] = array('d', [0]*nslots)
+        for i in range(len(cat.info)):
+            cols['infofiles'][cat.info[i][0]] = cat.info[i][1]
+            cols['infosizes'][cat.info[i][0]] = cat.info[i][2]
+        cols['direlm'] = array('I', [cls.NOELM]*nslots)
+        for dir_id, i in cat.dirindex().items():
+            cols['direlm'][dir_id] = i
+        # children: element ids grouped by parent, childstart[dir id] is where a folder's children start
+        cols['childorder'] = array('I', sorted(range(n), key=lambda i: elm[i][2]))
+        childstart = array('Q', [0]*(nslots+1))
+        for el in elm:
+            childstart[el[2]+1] += 1
+        for i in range(nslots):
+            childstart[i+1] += childstart[i]
+        cols['childstart'] = childstart
+        sizeorder, sizes, dateorder, dates = cat.rangeindex()
+        cols['sizeorder'] = sizeorder
+        cols['sortsizes'] = sizes
+        cols['dateorder'] = dateorder
+        cols['sortdates'] = dates
+
+        header = {'date': cat.date, 'device': cat.device, 'volume': cat.volume, 'alias': cat.alias,
+                  'volumename': cat.volumename, 'serial': cat.serial, 'comment': cat.comment,
+                  'freesize': cat.freesize, 'archive': cat.archive, 'byteorder': byteorder, 'columns': {}}
+        # column offsets depend on the header length, so reserve room for the offsets first
+        for name, typecode in cls.columns:
+            header['columns'][name] = [10**15, typecode, len(cols[name])]
+        headlen = calcsize('<8sqqq') + len(json.dumps(header).encode('utf-8'))
+        offset = headlen + (-headlen) % 8
+        for name, typecode in cls.columns:
+            header['columns'][name][0] = offset
+            offset = offset + cols[name].itemsize*len(cols[name])
+            offset = offset + (-offset) % 8
+        meta = json.dumps(header).encode('utf-8')
+        meta = meta + b' '*(headlen - calcsize('<8sqqq') - len(meta))
+
+        tmpname = pathmapname + '.tmp'
+        try:
+            with open(tmpname, 'wb') as fp:
+                fp.write(pack('<8sqqq', b'CATHYMAP', st.st_size, cls.mtime_ns(st), len(meta)))
+                fp.write(meta)
+                for name, typecode in cls.columns:
+                    fp.write(b'\x00'*((-fp.tell()) % 8))
+                    cols[name].tofile(fp)
+            os.replace(tmpname, pathmapname)
+        finally:
+            if ospath.isfile(tmpname):
+                os.remove(tmpname)
+        return True
+
+    @classmethod
+    def mtime_ns(cls, st):
+        # the .caf mtime a .cam is built from, in ns so an in-place header patch right after a build is noticed
+        return st.st_mtime_ns
+
+    @classmethod
+    def is_current(cls, pathcatname, pathmapname):
+        # True if the .cam exists, was built from the current .caf and on a machine with the same byte order
+        if not ospath.isfile(pathmapname):
+            return False
+        st = os.stat(pathcatname)
+        with open(pathmapname, 'rb') as fp:
+            head = fp.read(calcsize('<8sqqq'))
+            if len(head) != calcsize('<8sqqq'):
+                return False
+            magic, cafsize, cafmtime, metalen = unpack('<8sqqq', head)
+            if magic != b'CATHYMAP' or cafsize != st.st_size or cafmtime != cls.mtime_ns(st):
+                return False
+            header = json.loads(fp.read(metalen).decode('utf-8'))
+        return header['byteorder'] == byteorder
+
+    @classmethod
+    def from_mapfile(cls, pathmapname, pathcatname=None):
+        '''
+        maps a .cam file read-only, pathcatname is what cat.pathcat is set to
+        '''
+        with open(pathmapname, 'rb') as fp:
+            magic, cafsize, cafmtime, metalen = unpack('<8sqqq', fp.read(calcsize('<8sqqq')))
+            header = json.loads(fp.read(metalen).decode('utf-8'))
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        cols = {}
+        for name, typecode in cls.columns:
+            offset, typecode, count = header['columns'][name]
+            cols[name] = view[offset:offset+count*array(typecode).itemsize].cast(typecode)
+
+        elm = MappedElements(cols['dates'], cols['sizes'], cols['parents'], cols['nameoff'], cols['names'])
+        info = MappedInfo(cols['infofiles'], cols['infosizes'])
+        cat = cls(pathcatname or pathmapname, header['date'], header['device'], header['volume'], header['alias'],
+                  header['volumename'], header['serial'], header['comment'], header['freesize'], header['archive'],
+                  info, elm)
+        cat.mm = mm
+        cat.header = header
+        cat.cols = cols
+        cat._dirindex = MappedDirIndex(cols['direlm'])
+        cat._rangeindex = (cols['sizeorder'], cols['sortsizes'], cols['dateorder'], cols['sortdates'])
+        return cat
+
+    def write(self, pathcatname):
+        raise TypeError("a mapped catalog is read-only, write the .caf it was built from")
+
+    def iterelements(self):
+        # the elements are already in the mapped columns, elmoffset and version don't apply to a .cam
+        return iter(self.elm)
+
+    def getChildren(self, id):
+        cols = self.cols
+        children = []
+        if id < 0 or id+1 >= len(cols['childstart']):
+            return children
+        for i in cols['childorder'][cols['childstart'][id]:cols['childstart'][id+1]]:
+            dt, lg, pn, nm = self.elm[i]
+            if lg < 0:
+                children.append((nm, int(self.info[-lg][2]), str(-lg)))
+            else:
+                children.append((nm, int(lg), ""))
+        return children
+
+    def findrange(self, minsize=None, maxsize=None, after=None, before=None, searchterm=''):
+        # without limits the name search on the lowercase names is faster than going over all files
+        if [minsize, maxsize, after, before] == [None]*4:
+            sizes = self.cols['sizes']
+            return [i for i in self.search(searchterm) if sizes[i] >= 0]
+        return CathyCat.findrange(self, minsize, maxsize, after, before, searchterm)
+
+    def search(self, searchterm):
+        '''
+        returns the ids of the elements whose name contains all terms of searchterm (like searchFor),
+        found with mmap.find on the lowercase names without decoding every name
+        '''
+        try:
+            terms = [term.encode('latin1') for term in searchterm.lower().split(' ') if term]
+        except UnicodeEncodeError:
+            return []
+        if not terms:
+            return list(range(len(self.elm)))
+        first = max(terms, key=len)
+        nameoff = self.cols['nameoff']
+        found = []
+        base, typecode, count = self.header['columns']['lnames']
+        end = base + count
+        pos = base
+        while True:
+            pos = self.mm.find(first, pos, end)
+            if pos < 0:
+                break
+            i = bisect_right(nameoff, pos-base) - 1
+            namestart = base + nameoff[i]
+            nameend = base + nameoff[i+1] - 1
+            lname = self.mm[namestart:nameend]
+            for term in terms:
+                if not term in lname:
+                    break
+            else:
+                found.append(i)
+            pos = nameend + 1
+        return found
+
+
+class PatternMatcher():
+    '''
+    matches a name against many patterns at once (case insensitive)
+    substrings use an Aho-Corasick automaton, so a name is walked once whatever the number of patterns,
+    with exact=True whole names are looked up in a dict
+    matcher.match(name) returns the list of matching patterns
+    '''
+
+    def __init__(self, patterns, exact=False):
+        self.exact = exact
+        self.patterns = [pattern for pattern in dict.fromkeys(patterns) if pattern]
+        if exact:
+            self.names = {}
+            for pattern in self.patterns:
+                self.names.setdefault(pattern.lower(), []).append(pattern)
+            return
+
+        # trie of the lowercase patterns, out holds the patterns ending in a state
+        self.goto = [{}]
+        self.out = [[]]
+        for pattern in self.patterns:
+            state = 0
+            for c in pattern.lower():
+                if c not in self.goto[state]:
+                    self.goto.append({})
+                    self.out.append([])
+                    self.goto[state][c] = len(self.goto) - 1
+                state = self.goto[state][c]
+            self.out[state].append(pattern)
+
+        # failure links breadth first, a state also reports the patterns of its failure state
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(c, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def match(self, name):
+        if self.exact:
+            return self.names.get(name.lower(), [])
+        goto = self.goto
+        fail = self.fail
+        found = []
+        state = 0
+        for c in name.lower():
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if self.out[state]:
+                found.extend(self.out[state])
+        return found
+
 # functions that use CathyCat
 
 
@@ -626,12 +1220,512 @@ def searchFor(pth, searchterm, archive=False):
     return matches
 
 
+def parseSize(txt):
+    # '4G' -> 4*1000**3, decimal like the sizes usage/top/search print, plain numbers are bytes
+    txt = txt.strip().upper().rstrip('B')
+    units = {'K': 1000, 'M': 1000**2, 'G': 1000**3, 'T': 1000**4}
+    if txt and txt[-1] in units:
+        return int(float(txt[:-1])*units[txt[-1]])
+    return int(txt)
+
+
+def parseDate(txt):
+    # 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' (local time) -> unix time
+    for fmt in ('%Y-%m-%d', '%Y-%m', '%Y'):
+        try:
+            return int(time.mktime(datetime.datetime.strptime(txt.strip(), fmt).timetuple()))
+        except ValueError:
+            pass
+    raise ValueError("Unknown date format: %s (use YYYY-MM-DD)" % txt)
+
+
+def loadCat(pathcatname, mapdir=None, cache=None):
+    # maps the .cam of a .caf (see loadMapped), or returns it from cache (a dict) if the .caf didn't change since
+    # if the .cam can't be written the .caf is read into memory instead
+    mtime = os.stat(pathcatname).st_mtime
+    if cache is not None and pathcatname in cache and cache[pathcatname][0] == mtime:
+        return cache[pathcatname][1]
+    try:
+        cat = loadMapped(pathcatname, mapdir)
+    except (IOError, OSError) as e:
+        print("Could not map", pathcatname, "(", e, ") reading it instead")
+        cat = CathyCat.from_file(pathcatname)
+    if cache is not None:
+        cache[pathcatname] = (mtime, cat)
+    return cat
+
+
+def findFiles(pth, searchterm='', minsize=None, maxsize=None, after=None, before=None, archive=False, cache=None, mapdir=None):
+    '''
+    finds files by size and date range (unix time, after <= date < before) combined with name terms
+    in all .caf files in pth, returns a list of (path, size, date)
+    the queries run on the memory mapped .cam file of every .caf (in mapdir, default next to the .caf),
+    which is built on the first find, so only the matching entries are read and the catalog itself is not parsed
+    cache is an optional dict that keeps the mapped catalogs between calls
+    needs Python 3, like MappedCat
+    '''
+    matches = []
+    if '.caf' in pth:
+        cafList = [pth]
+    else:
+        cafList = makeCafList(pth)
+    for catname in cafList:
+        pathcatname = os.path.join(pth, catname)
+        if cache is not None and pathcatname in cache:
+            cat = loadCat(pathcatname, mapdir, cache)
+        else:
+            cat = CathyCat.fast_from_file(pathcatname)
+        if cat is None:
+            continue
+        if cat.archive and not archive:
+            print("Skipping", catname, "for search because of archive bit")
+            continue
+        cat = loadCat(pathcatname, mapdir, cache)
+        if cat is None:
+            continue
+        for i in cat.findrange(minsize, maxsize, after, before, searchterm):
+            matches.append((cat.path(i), cat.elm[i][1], cat.elm[i][0]))
+    return matches
+
+
+def printFind(pth, args):
+    # cli for findFiles: [terms] [--min-size n] [--max-size n] [--after date] [--before date] [--archive] [--mapdir dir]
+    usage = ("Use 'python cathy.py find [terms] [--min-size n] [--max-size n] [--after date] [--before date]"
+             " [--archive] [--mapdir dir]'")
+    if not args:
+        exit("Missing search terms or limits.\n" + usage)
+    terms = []
+    limits = {}
+    archive = False
+    mapdir = None
+    i = 0
+    while i < len(args):
+        if args[i] == '--archive':
+            archive = True
+        elif args[i] in ('--mapdir', '--min-size', '--max-size', '--after', '--before'):
+            i = i + 1
+            if i >= len(args):
+                exit("Missing value for %s.\n%s" % (args[i-1], usage))
+            try:
+                if args[i-1] == '--mapdir':
+                    mapdir = args[i]
+                elif args[i-1] in ('--min-size', '--max-size'):
+                    limits[args[i-1]] = parseSize(args[i])
+                else:
+                    limits[args[i-1]] = parseDate(args[i])
+            except ValueError:
+                exit("Invalid value for %s: %s\n%s" % (args[i-1], args[i], usage))
+        else:
+            terms.append(args[i])
+        i = i + 1
+    matches = findFiles(pth, ' '.join(terms), limits.get('--min-size'), limits.get('--max-size'),
+                        limits.get('--after'), limits.get('--before'), archive, mapdir=mapdir)
+    for fpath, size, date in matches:
+        print("{0:>14,}\t{1}\t{2}".format(size, time.strftime('%Y-%m-%d', time.localtime(date)), fpath))
+
+
+# histogram bins for spaceReport: (upper limit, label), the last bin catches everything above
+# decimal units, like the Gb column next to them
+SIZE_BINS = [(1000, '< 1 KB'), (1000**2, '< 1 MB'), (10*1000**2, '< 10 MB'), (100*1000**2, '< 100 MB'),
+             (1000**3, '< 1 GB'), (10*1000**3, '< 10 GB'), (100*1000**3, '< 100 GB')]
+SIZE_REST = '>= 100 GB'
+AGE_BINS = [(30, '< 1 month'), (182, '< 6 months'), (365, '< 1 year'), (2*365, '< 2 years'),
+            (5*365, '< 5 years'), (10*365, '< 10 years')]
+AGE_REST = '>= 10 years'
+
+
+def pushTop(heap, item, n):
+    # keeps heap at the n largest items seen
+    if len(heap) < n:
+        heapq.heappush(heap, item)
+    elif heap and item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def dirPath(cat, dirs, dir_id):
+    # builds the path of a folder from a {dir_id: (parent id, name)} dict collected while streaming
+    pths = []
+    while dir_id != 0:
+        if dir_id not in dirs:
+            pths.append("ERRDIR")
+            break
+        dir_id, nm = dirs[dir_id]
+        pths.append(nm)
+    pths.append(cat.catpath())
+    pths.reverse()
+    return ospath.sep.join(pths)
+
+
+def spaceReport(pth, topn=20):
+    '''
+    single pass over all .caf files in pth, returns
+    (topfiles, topdirs, sizehist, agehist)
+    topfiles and topdirs are lists of (size, catname, path), largest first
+    sizehist and agehist are lists of (label, filecount, totalsize)
+    files are never kept in memory, only the top n and the (parent, name) of every folder of the catalog
+    being read, so memory per catalog grows with its number of folders (like its info table) but not
+    with its number of files. The folders are kept so the paths of the top n can be built without
+    a second pass over the catalog.
+    '''
+    if '.caf' in pth:
+        cafList = [pth]
+    else:
+        cafList = makeCafList(pth)
+    now = time.time()
+    sizelimits = [x[0] for x in SIZE_BINS]
+    agelimits = [x[0]*86400 for x in AGE_BINS]
+    sizecnt = [[0, 0] for x in range(len(SIZE_BINS)+1)]
+    agecnt = [[0, 0] for x in range(len(AGE_BINS)+1)]
+    topfiles = []
+    topdirs = []
+    for catname in cafList:
+        cat = CathyCat.fast_from_file(os.path.join(pth, catname))
+        if cat is None:
+            continue
+        dirs = {}  # dir id -> (parent id, name), needed for the paths of the top n
+        catfiles = []
+        catdirs = []
+        for dt, lg, pn, nm in cat.iterelements():
+            if lg < 0:
+                dirs[-lg] = (pn, nm)
+                pushTop(catdirs, (int(cat.info[-lg][2]), pn, nm), topn)
+            else:
+                pushTop(catfiles, (lg, pn, nm), topn)
+                cnt = sizecnt[bisect_right(sizelimits, lg)]
+                cnt[0] += 1
+                cnt[1] += lg
+                cnt = agecnt[bisect_right(agelimits, now-dt)]
+                cnt[0] += 1
+                cnt[1] += lg
+        for size, pn, nm in catfiles:
+            pushTop(topfiles, (size, catname, ospath.join(dirPath(cat, dirs, pn), nm)), topn)
+        for size, pn, nm in catdirs:
+            pushTop(topdirs, (size, catname, ospath.join(dirPath(cat, dirs, pn), nm)), topn)
+    sizehist = [(label, sizecnt[i][0], sizecnt[i][1])
+                for i, label in enumerate([x[1] for x in SIZE_BINS]+[SIZE_REST])]
+    agehist = [(label, agecnt[i][0], agecnt[i][1])
+               for i, label in enumerate([x[1] for x in AGE_BINS]+[AGE_REST])]
+    return (sorted(topfiles, reverse=True), sorted(topdirs, reverse=True), sizehist, agehist)
+
+
+def printTop(pth, topn=20):
+    topfiles, topdirs, sizehist, agehist = spaceReport(pth, topn)
+    print("Largest files:")
+    for size, catname, fpath in topfiles:
+        print("{0:>10,}Mb\t{1:12}\t{2}".format(int(size/1000/1000), catname.replace(".caf", "")[:12], fpath))
+    print("\nLargest directories:")
+    for size, catname, fpath in topdirs:
+        print("{0:>10,}Mb\t{1:12}\t{2}".format(int(size/1000/1000), catname.replace(".caf", "")[:12], fpath))
+
+
+def printSizes(pth):
+    topfiles, topdirs, sizehist, agehist = spaceReport(pth, 0)
+    print("File sizes:")
+    for label, cnt, size in sizehist:
+        print("{0:12}\tFiles:\t{1:>12,}\t\tUsed:\t{2:>9,}Gb".format(label, cnt, int(size/1000/1000/1000)))
+    print("\nFile ages:")
+    for label, cnt, size in agehist:
+        print("{0:12}\tFiles:\t{1:>12,}\t\tUsed:\t{2:>9,}Gb".format(label, cnt, int(size/1000/1000/1000)))
+
+
+def batchLookup(pth, patterns, exact=False, archive=False):
+    '''
+    looks up many names or substrings at once in all .caf files in pth
+    every catalog is streamed once, whatever the number of patterns
+    returns a dict {pattern: [(catname, path, size)]}, patterns without hits have an empty list
+    '''
+    matcher = PatternMatcher(patterns, exact)
+    result = dict((pattern, []) for pattern in matcher.patterns)
+    if '.caf' in pth:
+        cafList = [pth]
+    else:
+        cafList = makeCafList(pth)
+    for catname in cafList:
+        cat = CathyCat.fast_from_file(os.path.join(pth, catname))
+        if cat is None:
+            continue
+        if cat.archive and not archive:
+            print("Skipping", catname, "for lookup because of archive bit")
+            continue
+        dirs = {}
+        hits = []
+        for dt, lg, pn, nm in cat.iterelements():
+            if lg < 0:
+                dirs[-lg] = (pn, nm)
+            found = matcher.match(nm)
+            if found:
+                hits.append((found, lg, pn, nm))
+        for found, lg, pn, nm in hits:
+            size = int(cat.info[-lg][2]) if lg < 0 else lg
+            fpath = ospath.join(dirPath(cat, dirs, pn), nm)
+            for pattern in set(found):
+                result[pattern].append((catname, fpath, size))
+    return result
+
+
+def readPatterns(patternfile):
+    # one pattern per line, read as bytes like the names in the .caf files
+    with open(patternfile, 'rb') as fp:
+        return [line.strip().decode('latin1') for line in fp]
+
+
+def printLookup(pth, args):
+    # cli for batchLookup: <patternfile> [--exact] [--archive], options can come before the file
+    files = [x for x in args if not x.startswith('--')]
+    if not files:
+        exit("Missing file with names.\nUse 'python cathy.py lookup <file> [--exact] [--archive]'")
+    if not ospath.isfile(files[0]):
+        exit("File not found: %s" % files[0])
+    patterns = readPatterns(files[0])
+    result = batchLookup(pth, patterns, exact='--exact' in args, archive='--archive' in args)
+    missing = []
+    for pattern in sorted(result):
+        if not result[pattern]:
+            missing.append(pattern)
+            continue
+        print(pattern)
+        for catname, fpath, size in result[pattern]:
+            print("\t{0:12}\t{1:>14,}\t{2}".format(catname.replace(".caf", "")[:12], size, fpath))
+    print("\nFound:", len(result)-len(missing), "Not found:", len(missing))
+    for pattern in missing:
+        print("\t", pattern)
+
+
+def mapCatalogs(pth, mapdir=None):
+    '''
+    builds the .cam file of every .caf in pth that has none or an outdated one (in mapdir, default pth)
+    and maps them, returns a dict {catname: MappedCat}
+    '''
+    cats = {}
+    for catname in makeCafList(pth):
+        cat = loadMapped(os.path.join(pth, catname), mapdir)
+        if cat is not None:
+            cats[catname] = cat
+    return cats
+
+
+def loadMapped(pathcatname, mapdir=None):
+    # maps the .cam file of a .caf (in mapdir, default next to the .caf), building it first if it is missing or outdated
+    if mapdir is None:
+        mapdir = os.path.dirname(pathcatname)
+    pathmapname = os.path.join(mapdir, os.path.basename(pathcatname)[:-4] + '.cam')
+    if not MappedCat.is_current(pathcatname, pathmapname):
+        print("Mapping", os.path.basename(pathcatname))
+        if not MappedCat.build(pathcatname, pathmapname):
+            return None
+    return MappedCat.from_mapfile(pathmapname, pathcatname)
+
+
+def searchMapped(cats, searchterm, archive=False, minsize=None, maxsize=None, after=None, before=None):
+    # searchFor, or findFiles when a limit is given, on a dict {catname: MappedCat} from mapCatalogs
+    # returns a list of (path, size)
+    matches = []
+    limits = [minsize, maxsize, after, before]
+    for catname in sorted(cats):
+        cat = cats[catname]
+        if cat.archive and not archive:
+            continue
+        if limits != [None]*4:
+            found = cat.findrange(minsize, maxsize, after, before, searchterm)
+        else:
+            found = cat.search(searchterm)
+        for i in found:
+            dt, lg, pn, nm = cat.elm[i]
+            if lg < 0:
+                matches.append((cat.path(i), int(cat.info[-lg][2])))
+            else:
+                matches.append((cat.path(i), lg))
+    return matches
+
+
+def patchHeaders(pth, catnames, **changes):
+    # CathyCat.patch_header for a list of .caf files (relative to pth), returns the number of patched files
+    cnt = 0
+    for catname in catnames:
+        pathcatname = os.path.join(pth, catname)
+        try:
+            patched = ospath.isfile(pathcatname) and CathyCat.patch_header(pathcatname, **changes)
+        except (IOError, OSError) as e:
+            print(e)
+            patched = False
+        if patched:
+            cnt = cnt + 1
+        else:
+            print("Could not patch", pathcatname)
+    print("Patched", cnt, "of", len(catnames), "caf files")
+    return cnt
+
+
+def patchArgs(args, name):
+    # splits the <caf> [<caf> ...] <value> arguments of setcomment/setalias, returns (catnames, value)
+    usage = "Use 'python cathy.py set%s <caf> [<caf> ...] \"<%s>\"', quote the %s if it has spaces" % (name, name, name)
+    if len(args) < 2:
+        exit("Missing caf file or %s.\n%s" % (name, usage))
+    for catname in args[:-1]:
+        if not catname.endswith('.caf'):
+            exit("Not a caf file: %s\n%s" % (catname, usage))
+    return args[:-1], args[-1]
+
+
+def physicalDevice(start_path):
+    # returns a key for the physical disk start_path is on, partitions of one disk get the same key
+    st = os.stat(start_path)
+    if platform == "linux" or platform == "linux2":
+        sysdev = '/sys/dev/block/%d:%d' % (os.major(st.st_dev), os.minor(st.st_dev))
+        if ospath.exists(sysdev):
+            real = ospath.realpath(sysdev)
+            if ospath.exists(ospath.join(real, 'partition')):
+                real = ospath.dirname(real)
+            return ospath.basename(real)
+    return str(st.st_dev)
+
+
+def mountedVolumes():
+    # returns the mount points of removable/external volumes
+    lst = []
+    if platform == "linux" or platform == "linux2":
+        with open('/proc/mounts') as fp:
+            for line in fp:
+                mnt = line.split(' ')[1].replace('\\040', ' ')
+                if mnt.startswith('/media/') or mnt.startswith('/mnt/') or mnt.startswith('/run/media/'):
+                    lst.append(mnt)
+    elif platform == "darwin":
+        for fil in os.listdir('/Volumes'):
+            mnt = os.path.join('/Volumes', fil)
+            if not ospath.islink(mnt) and ospath.ismount(mnt):
+                lst.append(mnt)
+    elif platform == "win32":
+        system = os.environ.get('SystemDrive', 'C:').upper()
+        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            if letter+':' != system and ospath.exists(letter+':\\'):
+                lst.append(letter+':')
+    return lst
+
+
+def scanDevice(paths, savedir, status, diskinfos, no_disk=False, archive=False):
+    # worker for scanVolumes, scans the volumes of one physical device one after the other
+    start = time.time()
+    for scanpath in paths:
+        progress = {}
+        status['current'] = progress
+        try:
+            cat = CathyCat.scan(scanpath, no_disk=no_disk, progress=progress, diskinfo=diskinfos.get(scanpath))
+            if archive:
+                cat.archive = 1
+            with status['lock']:
+                savename = os.path.join(savedir, cat.volume+".caf")
+                cnt = 1
+                while savename in status['saved']:
+                    cnt = cnt + 1
+                    savename = os.path.join(savedir, "%s-%d.caf" % (cat.volume, cnt))
+                status['saved'].append(savename)
+            cat.write_atomic(savename)
+            status['done'].append((scanpath, savename))
+            status['files'] = status['files'] + int(cat.info[0][1])
+            status['elements'] = status['elements'] + len(cat.elm)
+        except Exception as e:
+            status['errors'].append((scanpath, e))
+    status['current'] = None
+    status['time'] = time.time() - start
+
+
+def scanVolumes(paths, savedir, no_disk=False, archive=False, interval=1.0):
+    '''
+    scans several volumes in parallel, with one worker thread per physical device
+    every volume is saved as <volume>.caf in savedir
+    returns a dict {device: status} with 'done' [(path, caf)], 'errors' [(path, exception)],
+    'files', 'elements' and 'time' for every device
+    '''
+    devices = {}
+    missing = {}
+    for scanpath in dict.fromkeys(os.path.normpath(x) for x in paths):
+        try:
+            device = physicalDevice(scanpath)
+        except (IOError, OSError) as e:
+            # a path that can't be stat'ed is reported under its own key, the others are still scanned
+            missing[scanpath] = e
+            continue
+        devices.setdefault(device, []).append(scanpath)
+    lock = threading.Lock()
+    saved = []
+    workers = []
+    result = {}
+    for device in sorted(devices):
+        result[device] = {'paths': devices[device], 'done': [], 'errors': [], 'files': 0, 'elements': 0,
+                          'time': 0, 'current': None, 'lock': lock, 'saved': saved}
+    for scanpath in missing:
+        result[scanpath] = {'paths': [scanpath], 'done': [], 'errors': [(scanpath, missing[scanpath])], 'files': 0,
+                            'elements': 0, 'time': 0, 'current': None, 'lock': lock, 'saved': saved}
+
+    # label, serial and free space are read here, one volume after the other, so a sudo password
+    # prompt from blkid shows up once before the workers and the progress line start
+    diskinfos = {}
+    for device in sorted(devices):
+        for scanpath in devices[device]:
+            if no_disk:
+                continue
+            try:
+                diskinfos[scanpath] = CathyCat.get_disk_info(scanpath)
+            except Exception as e:
+                result[device]['errors'].append((scanpath, e))
+
+    for device in sorted(devices):
+        status = result[device]
+        paths = [x for x in devices[device] if no_disk or x in diskinfos]
+        worker = threading.Thread(target=scanDevice, args=(paths, savedir, status, diskinfos, no_disk, archive))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    while True:
+        alive = [w for w in workers if w.is_alive()]
+        line = []
+        for device in sorted(result):
+            status = result[device]
+            cnt = status['elements']
+            current = status['current']
+            if current is not None and 'cat' in current:
+                cnt = cnt + len(current['cat'].elm)
+            line.append("%s: %s/%s %s" % (device, len(status['done'])+len(status['errors']),
+                                          len(status['paths']), '{0:,}'.format(cnt)))
+        stdout.write("\r" + "  ".join(line))
+        stdout.flush()
+        if not alive:
+            break
+        alive[0].join(interval)
+    stdout.write("\n")
+
+    for status in result.values():
+        del status['lock'], status['saved'], status['current']
+    return result
+
+
+def printScanSummary(result):
+    for device in sorted(result):
+        status = result[device]
+        rate = status['files']/status['time'] if status['time'] else 0
+        print("{0:12}\tVolumes:\t{1:>3}\tFiles:\t{2:>10,}\t{3:>10,.0f} files/sec".format(
+            device[:12], len(status['done']), status['files'], rate))
+        for scanpath, savename in status['done']:
+            print("\t", scanpath, "->", savename)
+        for scanpath, e in status['errors']:
+            print("\t", scanpath, "failed:", e)
+
+
 if __name__ == '__main__':
 
     # pth = os.getcwd() #path to .caf files
     pth = os.path.dirname(os.path.realpath(__file__))
     # print(pth)
-    if len(argv) > 2:
+    if len(argv) >= 2 and "scanall" in argv[1]:
+        scanpaths = argv[2:]
+        if not scanpaths:
+            scanpaths = mountedVolumes()
+        print("Scanning:", ", ".join(scanpaths), "...")
+        result = scanVolumes(scanpaths, os.getcwd(), no_disk="dirscan" in argv[1], archive="archive" in argv[1])
+        printScanSummary(result)
+
+    elif len(argv) > 2:
         if "search" in argv[1]:
             searchFor(pth, argv[2])
 
@@ -663,11 +1757,19 @@ if __name__ == '__main__':
             print("Saving to:", savename)
             cat.write(savename)
 
+        elif "unsetarchive" in argv[1]:
+            patchHeaders(pth, argv[2:], archive=0)
+
         elif "setarchive" in argv[1]:
-            setpath = os.path.join(pth, argv[2])
-            cat = CathyCat.from_file(setpath)
-            cat.archive = 1
-            cat.write(setpath)
+            patchHeaders(pth, argv[2:], archive=1)
+
+        elif "setcomment" in argv[1]:
+            catnames, comment = patchArgs(argv[2:], 'comment')
+            patchHeaders(pth, catnames, comment=comment)
+
+        elif "setalias" in argv[1]:
+            catnames, alias = patchArgs(argv[2:], 'alias')
+            patchHeaders(pth, catnames, alias=alias)
 
         elif "export" in argv[1]:
             setpath = os.path.join(pth, argv[2])
@@ -679,6 +1781,20 @@ if __name__ == '__main__':
                         fp.write(cat.elm[i][3]+'\t'+str(cat.elm[i][1])+'\t' +
                                  cat.path(i).replace(cat.elm[i][3], '')+'\n')
 
+        elif "top" in argv[1]:
+            if not argv[2].isdigit() or int(argv[2]) < 1:
+                exit("Invalid count: %s\nUse 'python cathy.py top [count]'" % argv[2])
+            printTop(pth, int(argv[2]))
+
+        elif "find" in argv[1]:
+            printFind(pth, argv[2:])
+
+        elif "lookup" in argv[1]:
+            printLookup(pth, argv[2:])
+
+        elif "map" in argv[1]:
+            mapCatalogs(pth, argv[2])
+
     elif len(argv) == 2:
         if "usage" in argv[1]:
             cafList = makeCafList(pth)
@@ -693,5 +1809,20 @@ if __name__ == '__main__':
                 print("{0:12}\tFree:\t{1:>5}Gb\t\tUsed:\t{2:>5}Gb\t\tTotal:\t{3:>3.1f}Tb".format(
                     item[1].replace(".caf", "")[:12], item[0], item[2], float(item[0]+item[2])/1000))
 
+        elif "top" in argv[1]:
+            printTop(pth)
+
+        elif "sizes" in argv[1]:
+            printSizes(pth)
+
+        elif "find" in argv[1]:
+            printFind(pth, [])
+
+        elif "lookup" in argv[1]:
+            printLookup(pth, [])
+
+        elif "map" in argv[1]:
+            mapCatalogs(pth)
+
     else:
         print("Not enough arguments.\nUse 'python cathy.py search <term>' to search and 'python cathy.py scan <path>' to scan a device.")
@@ -0,0 +1,125 @@
+#!python3
+'''
+load test for the production server (python app.py <path> --workers N)
+
+starts the server for every worker count, lets a number of client processes request
+the disk list, a browse page and a search for some seconds and prints the throughput
+and the memory of the server processes. RSS counts the shared pages of the mapped catalogs
+in every process, PSS divides them over the processes that share them.
+The server processes and their memory are read from /proc, so this only runs on linux.
+
+USAGE
+
+python loadtest.py <path-to-caf-files> [--workers 1,2,4] [--seconds 10] [--clients 16] [--term <searchterm>]
+'''
+
+from __future__ import (print_function, division)
+
+import os
+import sys
+import time
+import subprocess
+import multiprocessing
+from sys import argv
+
+from urllib.request import urlopen
+from urllib.parse import urlencode, quote
+
+import cathy
+
+
+def client(args):
+    # requests the urls round robin until the time is up, returns the number of answered requests
+    base, urls, seconds = args
+    cnt = 0
+    end = time.time() + seconds
+    while time.time() < end:
+        url, data = urls[cnt % len(urls)]
+        urlopen(base + url, data).read()
+        cnt = cnt + 1
+    return cnt
+
+
+def children(pid):
+    # pids of the direct child processes of pid
+    pids = []
+    for fil in os.listdir('/proc'):
+        if fil.isdigit():
+            try:
+                with open('/proc/%s/stat' % fil) as fp:
+                    if int(fp.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        pids.append(int(fil))
+            except (IOError, OSError):
+                pass
+    return pids
+
+
+def memory(pid):
+    # (rss, pss) in kB of a process
+    rss = pss = 0
+    with open('/proc/%d/status' % pid) as fp:
+        for line in fp:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    if os.path.exists('/proc/%d/smaps_rollup' % pid):
+        with open('/proc/%d/smaps_rollup' % pid) as fp:
+            for line in fp:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    return rss, pss
+
+
+def run(cafpath, workers, seconds, clients, term, port):
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.realpath(__file__)), 'app.py'),
+                               cafpath, '--workers', str(workers), '--port', str(port)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = 'http://127.0.0.1:%d' % port
+    try:
+        for i in range(600):
+            try:
+                urlopen(base + '/').read()
+                break
+            except IOError:
+                time.sleep(0.1)
+        while len(children(server.pid)) < workers:
+            time.sleep(0.1)
+
+        disks = [x.replace('.caf', '') for x in cathy.makeCafList(cafpath)]
+        urls = [('/', None)]
+        urls = urls + [('/browse/%s/0' % quote(disk), None) for disk in disks]
+        urls.append(('/search', urlencode({'search': term}).encode()))
+        # one client for a second before measuring, it only warms up the workers that happen to accept its requests
+        client((base, urls, 1))
+
+        pool = multiprocessing.Pool(clients)
+        start = time.time()
+        result = pool.map_async(client, [(base, urls, seconds)]*clients)
+        time.sleep(seconds/2)
+        pids = [server.pid] + children(server.pid)
+        mem = [memory(pid) for pid in pids]
+        cnt = sum(result.get())
+        elapsed = time.time() - start
+        pool.close()
+        pool.join()
+    finally:
+        server.terminate()
+        server.wait()
+    return cnt/elapsed, sum(x[0] for x in mem), sum(x[1] for x in mem)
+
+
+if __name__ == '__main__':
+    if not sys.platform.startswith('linux'):
+        exit("loadtest.py reads the server processes from /proc and only runs on linux")
+    if len(argv) < 2:
+        exit("Missing path to caf files!")
+    options = dict(zip(argv[2::2], argv[3::2]))
+    workerlist = [int(x) for x in options.get('--workers', '1,2,4').split(',')]
+    seconds = float(options.get('--seconds', 10))
+    clients = int(options.get('--clients', 16))
+    term = options.get('--term', 'a')
+    port = int(options.get('--port', 5099))
+
+    print("{0:>8}\t{1:>10}\t{2:>10}\t{3:>10}".format("Workers", "Req/sec", "RSS Mb", "PSS Mb"))
+    for workers in workerlist:
+        rate, rss, pss = run(argv[1], workers, seconds, clients, term, port)
+        print("{0:>8}\t{1:>10,.0f}\t{2:>10,.0f}\t{3:>10,.0f}".format(workers, rate, rss/1024, pss/1024))
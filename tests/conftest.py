@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_tree(root, files):
+    for name, data in files.items():
+        fpath = os.path.join(root, name)
+        if not os.path.isdir(os.path.dirname(fpath)):
+            os.makedirs(os.path.dirname(fpath))
+        with open(fpath, 'wb') as fp:
+            fp.write(data)
+
+
+@pytest.fixture
+def make_tree():
+    # make_tree(root, {relative path: bytes}) writes the files, creating the folders on the way
+    return write_tree
@@ -0,0 +1,120 @@
+import datetime
+import os
+import random
+import time
+
+import pytest
+
+import cathy
+
+
+@pytest.fixture
+def catalogs(tmp_path, make_tree):
+    # a catalog of files with random sizes and dates: (dir with the .caf, path of the .caf)
+    rnd = random.Random(7)
+    tree = str(tmp_path / 'disk')
+    files = {}
+    for i in range(80):
+        folder = rnd.choice(['', 'photos/', 'photos/old/', 'docs/', 'Docs/More/'])
+        files['%s%s%d.%s' % (folder, rnd.choice(['img', 'IMG', 'note', 'backup']), i, rnd.choice(['jpg', 'txt']))] = \
+            b'x'*rnd.choice([0, 1, 10, 999, 1000, 1001, rnd.randint(0, 5000)])
+    make_tree(tree, files)
+    for name in files:
+        mtime = rnd.choice([1000000000, 1500000000, rnd.randint(1000000000, 1600000000)])
+        os.utime(os.path.join(tree, name), (mtime, mtime))
+    pth = str(tmp_path / 'cafs')
+    os.mkdir(pth)
+    pathcatname = os.path.join(pth, 'disk.caf')
+    cathy.CathyCat.scan(tree, no_disk=True).write(pathcatname)
+    return pth, pathcatname
+
+
+def brute(cat, minsize=None, maxsize=None, after=None, before=None, searchterm=''):
+    terms = [term for term in searchterm.lower().split(' ') if term]
+    found = []
+    for i in range(len(cat.elm)):
+        dt, lg, pn, nm = cat.elm[i]
+        if lg < 0 or (minsize is not None and lg < minsize) or (maxsize is not None and lg > maxsize):
+            continue
+        if (after is not None and dt < after) or (before is not None and dt >= before):
+            continue
+        if all(term in nm.lower() for term in terms):
+            found.append(i)
+    return found
+
+
+def test_findrange_random(tmp_path, catalogs):
+    pth, pathcatname = catalogs
+    cat = cathy.CathyCat.from_file(pathcatname)
+    assert cathy.MappedCat.build(pathcatname, str(tmp_path / 'disk.cam'))
+    mapped = cathy.MappedCat.from_mapfile(str(tmp_path / 'disk.cam'), pathcatname)
+    sizes = [el[1] for el in cat.elm if el[1] >= 0]
+    dates = [el[0] for el in cat.elm if el[1] >= 0]
+
+    rnd = random.Random(11)
+    for query in range(500):
+        limits = {}
+        if rnd.random() < 0.5:
+            limits['minsize'] = rnd.choice(sizes + [-1, 0, 6000])
+        if rnd.random() < 0.5:
+            limits['maxsize'] = rnd.choice(sizes + [-1, 0, 6000])
+        if rnd.random() < 0.5:
+            limits['after'] = rnd.choice(dates + [0, 2000000000])
+        if rnd.random() < 0.5:
+            limits['before'] = rnd.choice(dates + [0, 2000000000])
+        limits['searchterm'] = rnd.choice(['', 'img', 'IMG jpg', 'note 1', 'nothing'])
+        expected = brute(cat, **limits)
+        assert cat.findrange(**limits) == expected
+        assert mapped.findrange(**limits) == expected
+
+
+def test_findrange_half_open(catalogs):
+    pth, pathcatname = catalogs
+    cat = cathy.CathyCat.from_file(pathcatname)
+    onday = [i for i in range(len(cat.elm)) if cat.elm[i][1] >= 0 and cat.elm[i][0] == 1500000000]
+    assert onday
+    assert cat.findrange(after=1500000000, before=1500000000) == []
+    assert cat.findrange(after=1500000000, before=1500000001) == onday
+    assert not set(onday) & set(cat.findrange(before=1500000000))
+    assert set(onday) <= set(cat.findrange(after=1500000000))
+    assert cat.findrange(minsize=1000, maxsize=1000) == [i for i in range(len(cat.elm)) if cat.elm[i][1] == 1000]
+
+
+def test_parsesize():
+    assert cathy.parseSize('123') == 123
+    assert cathy.parseSize('4G') == 4*1000**3
+    assert cathy.parseSize('1.5k') == 1500
+    assert cathy.parseSize(' 10MB ') == 10*1000**2
+    assert cathy.parseSize('2T') == 2*1000**4
+    assert cathy.parseSize('0') == 0
+    for txt in ('abc', '', 'G', '4X'):
+        with pytest.raises(ValueError):
+            cathy.parseSize(txt)
+
+
+def test_parsedate():
+    assert cathy.parseDate('2020') == time.mktime(datetime.datetime(2020, 1, 1).timetuple())
+    assert cathy.parseDate('2020-02') == time.mktime(datetime.datetime(2020, 2, 1).timetuple())
+    assert cathy.parseDate('2020-02-03') == time.mktime(datetime.datetime(2020, 2, 3).timetuple())
+    for txt in ('notadate', '2020/02/03', '2020-13'):
+        with pytest.raises(ValueError):
+            cathy.parseDate(txt)
+
+
+def test_findfiles(tmp_path, catalogs):
+    pth, pathcatname = catalogs
+    cat = cathy.CathyCat.from_file(pathcatname)
+    expected = [(cat.path(i), cat.elm[i][1], cat.elm[i][0]) for i in brute(cat, minsize=1000, searchterm='img')]
+    assert expected
+    # a file that isn't a catalog is skipped
+    with open(os.path.join(pth, 'junk.caf'), 'wb') as fp:
+        fp.write(b'not a catalog')
+
+    # the .cam can't be written in a missing mapdir, so the catalog is read instead
+    missing = str(tmp_path / 'missing')
+    assert cathy.findFiles(pth, 'img', minsize=1000, mapdir=missing) == expected
+    assert not os.path.exists(missing)
+
+    assert cathy.findFiles(pth, 'img', minsize=1000) == expected
+    assert os.path.isfile(os.path.join(pth, 'disk.cam'))
+    assert cathy.findFiles(pth, 'img', minsize=1000) == expected
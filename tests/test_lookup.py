@@ -0,0 +1,64 @@
+import os
+import random
+
+import cathy
+
+
+def brute(patterns, name, exact=False):
+    if exact:
+        return set(p for p in patterns if p and p.lower() == name.lower())
+    return set(p for p in patterns if p and p.lower() in name.lower())
+
+
+def randword(rnd, maxlen):
+    # a small alphabet, so patterns overlap and share prefixes and suffixes
+    return ''.join(rnd.choice('abcAB') for i in range(rnd.randint(0, maxlen)))
+
+
+def test_matcher_random():
+    rnd = random.Random(42)
+    for case in range(2000):
+        patterns = [randword(rnd, 4) for i in range(rnd.randint(1, 8))]
+        patterns = patterns + rnd.sample(patterns, rnd.randint(0, len(patterns)))
+        names = [randword(rnd, 10) for i in range(5)]
+        for exact in (False, True):
+            matcher = cathy.PatternMatcher(patterns, exact)
+            assert matcher.patterns == [p for p in dict.fromkeys(patterns) if p]
+            for name in names + patterns:
+                assert set(matcher.match(name)) == brute(patterns, name, exact)
+
+
+def test_matcher_cases():
+    matcher = cathy.PatternMatcher(['he', 'she', 'his', 'hers', 'HE', '', 'he'])
+    assert matcher.patterns == ['he', 'she', 'his', 'hers', 'HE']
+    assert sorted(matcher.match('ushers')) == ['HE', 'he', 'hers', 'she']
+    # every hit is reported, a pattern found twice in a name is in the list twice
+    assert matcher.match('hehe').count('he') == 2
+    assert matcher.match('') == []
+
+    exact = cathy.PatternMatcher(['Photo.JPG', 'photo.jpg', 'photo', ''], exact=True)
+    assert sorted(exact.match('PHOTO.jpg')) == ['Photo.JPG', 'photo.jpg']
+    assert exact.match('photo.jpg.bak') == []
+
+
+def test_batchlookup(tmp_path, make_tree):
+    tree = str(tmp_path / 'disk')
+    make_tree(tree, {'photos/holiday.jpg': b'x'*10, 'photos/jpg/holiday.jpg.jpg': b'y', 'docs/notes.txt': b'zz'})
+    pth = str(tmp_path / 'cafs')
+    os.mkdir(pth)
+    cathy.CathyCat.scan(tree, no_disk=True).write(os.path.join(pth, 'disk.caf'))
+    patternfile = str(tmp_path / 'names.txt')
+    with open(patternfile, 'wb') as fp:
+        fp.write(b'jpg\r\n\r\nNOTES.TXT\njpg\n  \nmissing\n')
+
+    patterns = cathy.readPatterns(patternfile)
+    result = cathy.batchLookup(pth, patterns)
+    assert sorted(result) == ['NOTES.TXT', 'jpg', 'missing']
+    assert sorted(fpath for catname, fpath, size in result['jpg']) == [
+        'disk/photos/holiday.jpg', 'disk/photos/jpg', 'disk/photos/jpg/holiday.jpg.jpg']
+    assert result['NOTES.TXT'] == [('disk.caf', 'disk/docs/notes.txt', 2)]
+    assert result['missing'] == []
+
+    result = cathy.batchLookup(pth, patterns, exact=True)
+    assert [fpath for catname, fpath, size in result['jpg']] == ['disk/photos/jpg']
+    assert [fpath for catname, fpath, size in result['NOTES.TXT']] == ['disk/docs/notes.txt']
@@ -0,0 +1,40 @@
+import os
+
+import cathy
+
+
+def roundtrip(tmp_path, make_tree, files):
+    tree = str(tmp_path / 'disk')
+    os.mkdir(tree)
+    make_tree(tree, files)
+    pathcatname = str(tmp_path / 'disk.caf')
+    pathmapname = str(tmp_path / 'disk.cam')
+    cathy.CathyCat.scan(tree, no_disk=True).write(pathcatname)
+
+    assert cathy.MappedCat.build(pathcatname, pathmapname)
+    assert cathy.MappedCat.is_current(pathcatname, pathmapname)
+    return cathy.CathyCat.from_file(pathcatname), cathy.MappedCat.from_mapfile(pathmapname, pathcatname)
+
+
+def check_equal(cat, mapped):
+    assert list(mapped.elm) == cat.elm
+    assert list(mapped.iterelements()) == cat.elm
+    assert list(mapped.info) == cat.info
+    for field in ('date', 'device', 'volume', 'alias', 'volumename', 'serial', 'comment', 'freesize', 'archive'):
+        assert getattr(mapped, field) == getattr(cat, field)
+    for dir_id in range(-1, len(cat.info)+1):
+        assert mapped.getChildren(dir_id) == cat.getChildren(dir_id)
+    for i in range(len(cat.elm)):
+        assert mapped.path(i) == cat.path(i)
+
+
+def test_roundtrip(tmp_path, make_tree):
+    cat, mapped = roundtrip(tmp_path, make_tree, {'x.txt': b'x', 'sub/y.bin': b'y'*100, 'sub/deeper/z.txt': b'zz',
+                                                  'other/w.txt': b'', 'other/v.txt': b'vvv'})
+    assert len(cat.elm) > 0
+    check_equal(cat, mapped)
+
+
+def test_roundtrip_empty(tmp_path, make_tree):
+    cat, mapped = roundtrip(tmp_path, make_tree, {})
+    check_equal(cat, mapped)
@@ -0,0 +1,98 @@
+import os
+from struct import pack
+
+import pytest
+
+import cathy
+
+
+@pytest.fixture
+def caf(tmp_path, make_tree):
+    # a small catalog with a comment and an alias: (path of the .caf, its bytes)
+    tree = str(tmp_path / 'disk')
+    make_tree(tree, {'x.txt': b'x', 'sub/y.bin': b'y'*100, 'sub/z.txt': b'zz'})
+    cat = cathy.CathyCat.scan(tree, no_disk=True)
+    cat.comment = 'a comment'
+    cat.alias = 'alias'
+    pathcatname = str(tmp_path / 'disk.caf')
+    cat.write(pathcatname)
+    with open(pathcatname, 'rb') as fp:
+        return pathcatname, fp.read()
+
+
+def read(pathcatname):
+    with open(pathcatname, 'rb') as fp:
+        return fp.read()
+
+
+def test_archive_in_place(caf):
+    pathcatname, before = caf
+    fields, end = cathy.CathyCat.header_fields(pathcatname)
+    offset, nb = fields['archive']
+    assert nb == 2
+
+    assert cathy.CathyCat.patch_header(pathcatname, archive=1)
+
+    after = read(pathcatname)
+    assert len(after) == len(before)
+    assert after[:offset] == before[:offset]
+    assert after[offset:offset+2] == pack('h', 1)
+    assert after[offset+2:] == before[offset+2:]
+    assert cathy.CathyCat.fast_from_file(pathcatname).archive == 1
+
+
+def test_strings_change_length(caf):
+    pathcatname, before = caf
+    cat = cathy.CathyCat.from_file(pathcatname)
+    fields, end = cathy.CathyCat.header_fields(pathcatname)
+
+    assert cathy.CathyCat.patch_header(pathcatname, comment='a much longer comment than before', alias='')
+
+    after = read(pathcatname)
+    newfields, newend = cathy.CathyCat.header_fields(pathcatname)
+    assert after[newend:] == before[end:]
+    assert len(after) - len(before) == newend - end
+    for name in ('version', 'date'):
+        offset, nb = fields[name]
+        newoffset, newnb = newfields[name]
+        assert after[newoffset:newoffset+newnb] == before[offset:offset+nb]
+    assert not os.path.exists(pathcatname + '.tmp')
+
+    patched = cathy.CathyCat.from_file(pathcatname)
+    assert patched.comment == 'a much longer comment than before'
+    assert patched.alias == ''
+    assert patched.date == cat.date
+    assert patched.version == cat.version
+    assert patched.elm == cat.elm
+    assert patched.info == cat.info
+
+
+def test_invalid_files(tmp_path, caf):
+    pathcatname, before = caf
+    fields, end = cathy.CathyCat.header_fields(pathcatname)
+    truncated = str(tmp_path / 'truncated.caf')
+    with open(truncated, 'wb') as fp:
+        fp.write(before[:fields['comment'][0]+2])
+    other = str(tmp_path / 'other.caf')
+    with open(other, 'wb') as fp:
+        fp.write(b'not a catalog at all')
+
+    for pathname in (truncated, other):
+        data = read(pathname)
+        assert not cathy.CathyCat.patch_header(pathname, comment='a much longer comment than before')
+        assert read(pathname) == data
+        assert not os.path.exists(pathname + '.tmp')
+
+
+def test_v5_has_no_archive(tmp_path, caf):
+    pathcatname, before = caf
+    fields, end = cathy.CathyCat.header_fields(pathcatname)
+    voffset, vnb = fields['version']
+    aoffset, anb = fields['archive']
+    v5 = before[:voffset] + pack('h', 5) + before[voffset+vnb:aoffset] + before[aoffset+anb:]
+    with open(pathcatname, 'wb') as fp:
+        fp.write(v5)
+
+    assert 'archive' not in cathy.CathyCat.header_fields(pathcatname)[0]
+    assert not cathy.CathyCat.patch_header(pathcatname, archive=1)
+    assert read(pathcatname) == v5
@@ -0,0 +1,42 @@
+import os
+
+import cathy
+
+
+def test_scanvolumes_no_disk(tmp_path, make_tree):
+    trees = [str(tmp_path / 'a' / 'disk'), str(tmp_path / 'b' / 'disk'), str(tmp_path / 'c' / 'other')]
+    make_tree(trees[0], {'x.txt': b'x', 'sub/y.bin': b'y'*100})
+    make_tree(trees[1], {'z.txt': b'zz'})
+    make_tree(trees[2], {'deep/er/w.txt': b'www', 'v.txt': b''})
+    savedir = str(tmp_path / 'out')
+    os.mkdir(savedir)
+
+    result = cathy.scanVolumes(trees, savedir, no_disk=True)
+
+    done = dict(sum([status['done'] for status in result.values()], []))
+    assert [status['errors'] for status in result.values()] == [[]]*len(result)
+    assert sorted(os.listdir(savedir)) == ['disk-2.caf', 'disk.caf', 'other.caf']
+    assert sorted(done.values()) == sorted(os.path.join(savedir, x) for x in ['disk-2.caf', 'disk.caf', 'other.caf'])
+    assert sum(status['files'] for status in result.values()) == 5
+
+    for scanpath, savename in done.items():
+        cat = cathy.CathyCat.from_file(savename)
+        scanned = cathy.CathyCat.scan(scanpath, no_disk=True)
+        assert cat.volume == os.path.basename(scanpath)
+        assert sorted(cat.elm, key=lambda x: x[3]) == sorted(scanned.elm, key=lambda x: x[3])
+        assert [x[1:] for x in cat.info] == [x[1:] for x in scanned.info]
+
+
+def test_scanvolumes_bad_and_duplicate_paths(tmp_path, make_tree):
+    tree = str(tmp_path / 'tree')
+    make_tree(tree, {'x.txt': b'x'})
+    nope = str(tmp_path / 'nope')
+    savedir = str(tmp_path / 'out')
+    os.mkdir(savedir)
+
+    result = cathy.scanVolumes([tree, tree + os.sep, nope], savedir, no_disk=True)
+
+    assert os.listdir(savedir) == ['tree.caf']
+    assert [path for path, e in result[nope]['errors']] == [nope]
+    assert isinstance(result[nope]['errors'][0][1], OSError)
+    assert sum(len(status['done']) for status in result.values()) == 1
@@ -0,0 +1,8 @@
+# WSGI entry point for production serving, i.e.
+#   CATHY_PATH=/path/to/caf/files gunicorn -w 4 --preload -b 0.0.0.0:5000 wsgi:application
+# CATHY_MAPDIR optionally sets where the memory mapped .cam files are kept (default the caf dir)
+import os
+import app
+
+app.configure(os.environ['CATHY_PATH'], os.environ.get('CATHY_MAPDIR'), use_map=True)
+application = app.app